@@ -0,0 +1,93 @@
+import timeit
+
+import pandas as pd
+
+from parsing import parse_bonded_tokens, parse_oracle_balance, parse_prices
+
+# payloads shaped like the ET and LCD responses
+PRICES = {
+    "created": "2022-03-01T00:00:00Z",
+    "prices": {
+        symbol: {"symbol": symbol, "price": 1.0 + i, "created": "2022-03-01T00:00:00Z"}
+        for i, symbol in enumerate(
+            ["LUNA", "yLUNA", "PRISM", "xPRISM"] + [f"TOKEN{n}" for n in range(200)]
+        )
+    },
+}
+BALANCES = {
+    "height": "1",
+    "result": [{"denom": denom, "amount": "123456789"} for denom in ["uluna", "uusd"]]
+    + [{"denom": f"u{n}", "amount": "1"} for n in range(20)],
+}
+POOL = {"pool": {"not_bonded_tokens": "1000000", "bonded_tokens": "430000000000000"}}
+
+
+def pandas_prices(response):
+
+    df = pd.json_normalize(pd.DataFrame.from_dict(response)["prices"]).set_index(
+        "symbol"
+    )
+
+    return tuple(
+        df.loc[symbol, "price"] for symbol in ["LUNA", "yLUNA", "PRISM", "xPRISM"]
+    )
+
+
+def pandas_balance(response):
+
+    df = pd.DataFrame.from_dict(response["result"]).set_index("denom")
+
+    return int(df.loc["uusd", "amount"]) / 1e6, int(df.loc["uluna", "amount"]) / 1e6
+
+
+def pandas_bonded(response):
+
+    df = pd.DataFrame.from_dict(response)
+
+    return int(df.loc["bonded_tokens", "pool"]) / 1e6
+
+
+def records_prices(response):
+
+    prices = parse_prices(response)
+
+    return prices.luna, prices.yluna, prices.prism, prices.xprism
+
+
+def records_balance(response):
+
+    balance = parse_oracle_balance(response)
+
+    return balance.ust, balance.luna
+
+
+CASES = [
+    ("prices", PRICES, pandas_prices, records_prices),
+    ("oracle balance", BALANCES, pandas_balance, records_balance),
+    ("bonded tokens", POOL, pandas_bonded, parse_bonded_tokens),
+]
+
+
+def main(number=2_000):
+
+    print(f"{'response':<16}{'pandas (us)':>14}{'records (us)':>14}{'speedup':>10}")
+
+    for name, response, pandas_parse, records_parse in CASES:
+        assert pandas_parse(response) == records_parse(response)
+
+        pandas_time = min(
+            timeit.repeat(lambda: pandas_parse(response), number=number, repeat=3)
+        )
+        records_time = min(
+            timeit.repeat(lambda: records_parse(response), number=number, repeat=3)
+        )
+
+        print(
+            f"{name:<16}{pandas_time / number * 1e6:>14.1f}"
+            f"{records_time / number * 1e6:>14.2f}"
+            f"{pandas_time / records_time:>9.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import io
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from farm_model import iter_scenario_columns, scenario_axes
+
+
+def to_arrow_table(columns):
+    """
+    Wrap a dict of numpy columns in an Arrow table without copying numeric buffers
+    """
+
+    return pa.table({name: pa.array(values) for name, values in columns.items()})
+
+
+def to_parquet_bytes(columns):
+    """
+    Serialize a dict of columns to Parquet bytes
+    """
+
+    sink = io.BytesIO()
+    pq.write_table(to_arrow_table(columns), sink)
+
+    return sink.getvalue()
+
+
+def to_ipc_bytes(columns):
+    """
+    Serialize a dict of columns to Arrow IPC file bytes
+    """
+
+    table = to_arrow_table(columns)
+    sink = pa.BufferOutputStream()
+    with ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    return sink.getvalue().to_pybytes()
+
+
+# label: (serializer, file extension, mime type)
+EXPORT_FORMATS = {
+    "Parquet": (to_parquet_bytes, "parquet", "application/vnd.apache.parquet"),
+    "Arrow IPC": (to_ipc_bytes, "arrow", "application/vnd.apache.arrow.file"),
+}
+
+
+def write_sweep(path, column_chunks, file_format="parquet"):
+    """
+    Stream column chunks into a single Parquet or Arrow IPC file, one row group or record batch per chunk
+    """
+
+    writer = None
+    n_rows = 0
+
+    try:
+        for columns in column_chunks:
+            table = to_arrow_table(columns)
+
+            if writer is None:
+                if file_format == "parquet":
+                    writer = pq.ParquetWriter(path, table.schema)
+                else:
+                    writer = ipc.new_file(path, table.schema)
+
+            writer.write_table(table)
+            n_rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return n_rows
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(
+        description="Export a PRISM Farm scenario sweep to Parquet or Arrow IPC."
+    )
+    parser.add_argument("output", help="Path of the file to write.")
+    parser.add_argument(
+        "--format", choices=["parquet", "arrow"], default="parquet", dest="file_format"
+    )
+
+    # prices
+    parser.add_argument("--yluna-price", type=float, required=True)
+    parser.add_argument("--xprism-price", type=float, required=True)
+    parser.add_argument("--prism-price", type=float, required=True)
+
+    # protocol state
+    parser.add_argument("--yluna-staked", type=float, required=True)
+    parser.add_argument("--xprism-pledged", type=float, required=True)
+    parser.add_argument("--total-amps", type=float, required=True)
+
+    # user position
+    parser.add_argument("--user-yluna", type=float, required=True)
+    parser.add_argument("--user-xprism", type=float, required=True)
+    parser.add_argument("--user-amps", type=float, default=0.0)
+
+    # grid
+    parser.add_argument(
+        "--step", type=float, default=0.1, help="Grid step as a fraction of position."
+    )
+    parser.add_argument("--max-day", type=int, default=14)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+
+    args = parser.parse_args(argv)
+
+    # the grid axes are built as multiples of these, so they must be positive
+    for option in ["user_yluna", "user_xprism", "step", "max_day", "chunk_size"]:
+        if getattr(args, option) <= 0:
+            parser.error(f"--{option.replace('_', '-')} must be positive")
+
+    farm_state = {
+        "yluna_price": args.yluna_price,
+        "xprism_price": args.xprism_price,
+        "prism_price": args.prism_price,
+        "yluna_staked": args.yluna_staked,
+        "xprism_pledged": args.xprism_pledged,
+        "total_amps": args.total_amps,
+        "user_yluna": args.user_yluna,
+        "user_xprism": args.user_xprism,
+        "user_amps": args.user_amps,
+    }
+
+    yluna_axis, xprism_axis, day_axis = scenario_axes(
+        args.user_yluna, args.user_xprism, step=args.step, max_day=args.max_day
+    )
+
+    n_rows = write_sweep(
+        args.output,
+        iter_scenario_columns(
+            yluna_axis, xprism_axis, day_axis, farm_state, args.chunk_size
+        ),
+        file_format=args.file_format,
+    )
+
+    print(f"Wrote {n_rows:,} scenarios to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+import numpy as np
+import pandas as pd
+
+
+# AMPS earned per pledged xPRISM per day
+AMPS_PER_DAY = 0.49992
+
+
+def scenario_axes(user_yluna, user_xprism, step=0.1, max_day=14):
+    """
+    Build the yLUNA, xPRISM and day axes of the scenario grid, including the current position
+    """
+
+    yluna_axis = np.append(
+        np.arange(user_yluna * 0.5, user_yluna * 5, user_yluna * step), user_yluna
+    )
+    xprism_axis = np.append(
+        np.arange(user_xprism * 0.5, user_xprism * 10, user_xprism * step), user_xprism
+    )
+    day_axis = np.arange(1, max_day + 1)
+
+    return yluna_axis, xprism_axis, day_axis
+
+
+def project_total_weight(yluna, xprism, amps, day_axis):
+    """
+    Project the population's total weight forward, each staker earning AMPS on their own pledge
+    """
+
+    projected_amps = (
+        amps[:, None] + xprism[:, None] * AMPS_PER_DAY * day_axis[None, :]
+    )
+
+    return np.sqrt(yluna[:, None] * projected_amps).sum(axis=0)
+
+
+def project_weight_growth(yluna, xprism, amps, day_axis):
+    """
+    Daily growth of the projected total weight, the analytic derivative of project_total_weight
+    """
+
+    projected_amps = (
+        amps[:, None] + xprism[:, None] * AMPS_PER_DAY * day_axis[None, :]
+    )
+    projected_weight = np.sqrt(yluna[:, None] * projected_amps)
+
+    growth = np.divide(
+        yluna[:, None] * xprism[:, None] * AMPS_PER_DAY,
+        2 * projected_weight,
+        out=np.zeros_like(projected_weight),
+        where=projected_weight > 0,
+    )
+
+    return growth.sum(axis=0)
+
+
+def project_others(project, state, day):
+    """
+    Evaluate a population projection at every day in day, once per distinct day
+    """
+
+    days, inverse = np.unique(day, return_inverse=True)
+    projected = project(
+        state["others_yluna"], state["others_xprism"], state["others_amps"], days
+    )
+
+    return projected[inverse].reshape(np.shape(day))
+
+
+def compute_scenarios(new_user_yluna, new_user_xprism, day, state):
+    """
+    Vectorized farm rewards for arrays of yLUNA, xPRISM and days pledged
+    """
+
+    position_size = (
+        new_user_yluna * state["yluna_price"] + new_user_xprism * state["xprism_price"]
+    )
+
+    new_yluna_staked = state["yluna_staked"] + new_user_yluna - state["user_yluna"]
+
+    # reset AMPS if xprism is unpledged
+    new_user_amps = (day * AMPS_PER_DAY) * new_user_xprism + np.where(
+        new_user_xprism < state["user_xprism"], 0.0, state["user_amps"]
+    )
+
+    new_user_weight = np.sqrt(new_user_yluna * new_user_amps)
+
+    new_total_amps = (day * AMPS_PER_DAY) * (
+        state["xprism_pledged"] + new_user_xprism
+    ) + state["total_amps"]
+
+    if "others_yluna" in state:
+        # exact weight of every other staker, projected per user
+        new_total_weight = new_user_weight + project_others(
+            project_total_weight, state, day
+        )
+    else:
+        new_total_weight = np.sqrt(new_yluna_staked * new_total_amps)
+
+    new_base_rewards = 104_000_000 * new_user_yluna / new_yluna_staked
+    new_base_apr = (
+        (new_base_rewards * state["prism_price"])
+        / (new_user_yluna * state["yluna_price"])
+        * 100
+    )
+
+    new_boost_rewards = 26_000_000 * new_user_weight / new_total_weight
+    new_boost_apr = (
+        (new_boost_rewards * state["prism_price"])
+        / (new_user_yluna * state["yluna_price"])
+        * 100
+    )
+
+    new_total_apr = new_base_apr + new_boost_apr
+    new_daily_rewards = (
+        (new_base_rewards + new_boost_rewards) * state["prism_price"] / 365
+    )
+
+    ratio = new_user_xprism / new_user_yluna
+
+    eff = np.sqrt(position_size**2 + new_daily_rewards**2)
+
+    return {
+        "day": day,
+        "position_size": position_size,
+        "new_user_yluna": new_user_yluna,
+        "new_user_xprism": new_user_xprism,
+        "new_yluna_staked": new_yluna_staked,
+        "new_user_amps": new_user_amps,
+        "new_user_weight": new_user_weight,
+        "new_total_amps": new_total_amps,
+        "new_total_weight": new_total_weight,
+        "new_base_rewards": new_base_rewards,
+        "new_base_apr": new_base_apr,
+        "new_boost_rewards": new_boost_rewards,
+        "new_boost_apr": new_boost_apr,
+        "new_total_apr": new_total_apr,
+        "new_daily_rewards": new_daily_rewards,
+        "ratio": ratio,
+        "eff": eff,
+    }
+
+
+def iter_scenario_columns(
+    yluna_axis, xprism_axis, day_axis, state, chunk_size=100_000
+):
+    """
+    Generate the scenario grid as column arrays of at most chunk_size rows, in yLUNA, xPRISM, day order
+    """
+
+    shape = (len(yluna_axis), len(xprism_axis), len(day_axis))
+    n_rows = int(np.prod(shape))
+
+    for start in range(0, n_rows, chunk_size):
+        i, j, k = np.unravel_index(
+            np.arange(start, min(start + chunk_size, n_rows)), shape
+        )
+        yield compute_scenarios(yluna_axis[i], xprism_axis[j], day_axis[k], state)
+
+
+def iter_scenario_chunks(yluna_axis, xprism_axis, day_axis, state, chunk_size=100_000):
+    """
+    Generate the scenario grid as DataFrame chunks of at most chunk_size rows
+    """
+
+    for columns in iter_scenario_columns(
+        yluna_axis, xprism_axis, day_axis, state, chunk_size
+    ):
+        yield pd.DataFrame(columns)
+
+
+class TopK:
+    """
+    Keep the k scenarios with the highest value in a column
+    """
+
+    def __init__(self, k, column="new_daily_rewards"):
+        self.k = k
+        self.column = column
+        self.rows = None
+
+    def update(self, chunk):
+        candidates = chunk.nlargest(self.k, self.column)
+        if self.rows is not None:
+            candidates = pd.concat([self.rows, candidates])
+        self.rows = candidates.nlargest(self.k, self.column)
+
+    def result(self):
+        return self.rows.reset_index(drop=True)
+
+
+class ParetoFrontier:
+    """
+    Keep the scenarios where no smaller position earns more daily rewards
+    """
+
+    def __init__(self, cost="position_size", value="new_daily_rewards"):
+        self.cost = cost
+        self.value = value
+        self.rows = None
+
+    def update(self, chunk):
+        candidates = chunk if self.rows is None else pd.concat([self.rows, chunk])
+        candidates = candidates.sort_values(
+            [self.cost, self.value], ascending=[True, False]
+        )
+
+        # a row is on the frontier if it beats every cheaper row
+        best_before = candidates[self.value].cummax().shift(fill_value=-np.inf)
+        self.rows = candidates[candidates[self.value] > best_before]
+
+    def result(self):
+        return self.rows.reset_index(drop=True)
+
+
+class DailySummary:
+    """
+    Running count, mean, min and max of a column for each day pledged
+    """
+
+    def __init__(self, day_axis, column="new_daily_rewards"):
+        self.day_axis = day_axis
+        self.column = column
+        self.count = np.zeros(len(day_axis))
+        self.total = np.zeros(len(day_axis))
+        self.min = np.full(len(day_axis), np.inf)
+        self.max = np.full(len(day_axis), -np.inf)
+
+    def update(self, chunk):
+        stats = chunk.groupby("day")[self.column].agg(["count", "sum", "min", "max"])
+        idx = np.searchsorted(self.day_axis, stats.index.to_numpy())
+
+        self.count[idx] += stats["count"].to_numpy()
+        self.total[idx] += stats["sum"].to_numpy()
+        self.min[idx] = np.minimum(self.min[idx], stats["min"].to_numpy())
+        self.max[idx] = np.maximum(self.max[idx], stats["max"].to_numpy())
+
+    def result(self):
+        seen = self.count > 0
+        return pd.DataFrame(
+            {
+                "day": self.day_axis[seen],
+                "count": self.count[seen].astype(int),
+                "mean": self.total[seen] / self.count[seen],
+                "min": self.min[seen],
+                "max": self.max[seen],
+            }
+        )
+
+
+def scenario_gradients(new_user_yluna, new_user_xprism, day, state):
+    """
+    Analytic partial derivatives of daily rewards and total APR w.r.t. yLUNA, xPRISM and days pledged
+
+    The xPRISM derivative is taken on the side that keeps the current AMPS, since unpledging resets them.
+    """
+
+    new_yluna_staked = state["yluna_staked"] + new_user_yluna - state["user_yluna"]
+
+    new_user_amps = (day * AMPS_PER_DAY) * new_user_xprism + np.where(
+        new_user_xprism < state["user_xprism"], 0.0, state["user_amps"]
+    )
+    new_user_weight = np.sqrt(new_user_yluna * new_user_amps)
+
+    # user weight, sqrt(yluna * amps)
+    d_weight_d_yluna = new_user_amps / (2 * new_user_weight)
+    d_weight_d_amps = new_user_yluna / (2 * new_user_weight)
+    d_weight_d_xprism = d_weight_d_amps * day * AMPS_PER_DAY
+    d_weight_d_day = d_weight_d_amps * AMPS_PER_DAY * new_user_xprism
+
+    # total weight, sqrt(total_yluna * total_amps) or the projected population
+    if "others_yluna" in state:
+        new_total_weight = new_user_weight + project_others(
+            project_total_weight, state, day
+        )
+        d_total_d_yluna = d_weight_d_yluna
+        d_total_d_xprism = d_weight_d_xprism
+        d_total_d_day = d_weight_d_day + project_others(
+            project_weight_growth, state, day
+        )
+    else:
+        pledged = state["xprism_pledged"] + new_user_xprism
+        new_total_amps = (day * AMPS_PER_DAY) * pledged + state["total_amps"]
+
+        new_total_weight = np.sqrt(new_yluna_staked * new_total_amps)
+        d_total_d_yluna = new_total_amps / (2 * new_total_weight)
+        d_total_d_xprism = (
+            new_yluna_staked * day * AMPS_PER_DAY / (2 * new_total_weight)
+        )
+        d_total_d_day = (
+            new_yluna_staked * AMPS_PER_DAY * pledged / (2 * new_total_weight)
+        )
+
+    # base pool share
+    new_base_rewards = 104_000_000 * new_user_yluna / new_yluna_staked
+    d_base = {
+        "yluna": 104_000_000
+        * (new_yluna_staked - new_user_yluna)
+        / new_yluna_staked**2,
+        "xprism": 0.0,
+        "day": 0.0,
+    }
+
+    # boost pool share, quotient rule on weight / total weight
+    new_boost_rewards = 26_000_000 * new_user_weight / new_total_weight
+    d_boost = {
+        name: 26_000_000
+        * (d_weight * new_total_weight - new_user_weight * d_total)
+        / new_total_weight**2
+        for name, d_weight, d_total in [
+            ("yluna", d_weight_d_yluna, d_total_d_yluna),
+            ("xprism", d_weight_d_xprism, d_total_d_xprism),
+            ("day", d_weight_d_day, d_total_d_day),
+        ]
+    }
+
+    rewards = new_base_rewards + new_boost_rewards
+    d_rewards = {name: d_base[name] + d_boost[name] for name in d_boost}
+
+    # total apr divides rewards by the yLUNA position
+    apr_scale = state["prism_price"] / state["yluna_price"] * 100
+    d_total_apr = {
+        name: apr_scale * d_rewards[name] / new_user_yluna for name in d_rewards
+    }
+    d_total_apr["yluna"] -= apr_scale * rewards / new_user_yluna**2
+
+    return {
+        "daily_rewards": {
+            name: d_rewards[name] * state["prism_price"] / 365 for name in d_rewards
+        },
+        "total_apr": d_total_apr,
+    }
@@ -0,0 +1,256 @@
+import base64
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# comma separated LCD mirrors, tried in order when hedging
+LCD_MIRRORS = [
+    mirror.strip().rstrip("/")
+    for mirror in os.environ.get("LCD_MIRRORS", "https://lcd.terra.dev").split(",")
+    if mirror.strip()
+]
+
+# per host (connect, read) timeouts in seconds
+TIMEOUTS = {
+    "lcd.terra.dev": (3.05, 10),
+    "api.extraterrestrial.money": (3.05, 10),
+    "api.coinhall.org": (3.05, 20),
+}
+DEFAULT_TIMEOUT = (3.05, 10)
+
+# statuses worth retrying, anything else is returned to the caller
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# statuses the LCD answers a failed query with, every mirror would answer the same
+QUERY_ERROR_STATUSES = {400}
+
+
+class RequestFailed(Exception):
+    """
+    Base error for requests made through the shared client
+    """
+
+
+class UpstreamUnavailable(RequestFailed):
+    """
+    Retries were exhausted or the endpoint's circuit is open
+    """
+
+
+class ResponseError(RequestFailed):
+    """
+    The endpoint answered with a status that retrying won't fix, or a body that isn't json
+    """
+
+    def __init__(self, url, status_code, body):
+        super().__init__(f"{url} returned {status_code}: {body[:200]}")
+        self.status_code = status_code
+        self.body = body
+
+
+class CircuitBreaker:
+    """
+    Stop calling a host after repeated failures, letting one trial through after a cooldown
+    """
+
+    def __init__(self, threshold=5, cooldown=30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+
+            # half open, let a single trial through
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                self.opened_at = time.monotonic()
+                return True
+
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class HttpClient:
+    """
+    Pooled HTTP client with per host timeouts, jittered retries, circuit breaking and hedged LCD requests
+    """
+
+    def __init__(
+        self,
+        lcd_mirrors=None,
+        timeouts=None,
+        retries=3,
+        backoff=0.25,
+        hedge_delay=0.5,
+        failure_threshold=5,
+        cooldown=30.0,
+        pool_size=16,
+    ):
+        self.settings = dict(
+            lcd_mirrors=lcd_mirrors,
+            timeouts=timeouts,
+            retries=retries,
+            backoff=backoff,
+            hedge_delay=hedge_delay,
+            failure_threshold=failure_threshold,
+            cooldown=cooldown,
+            pool_size=pool_size,
+        )
+        self.lcd_mirrors = lcd_mirrors or LCD_MIRRORS
+        self.timeouts = {**TIMEOUTS, **(timeouts or {})}
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge_delay = hedge_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.breakers = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=pool_size)
+
+    def __reduce__(self):
+        # rebuilt from settings, so st.cache hashes a client by its configuration
+        return _from_settings, (self.settings,)
+
+    def breaker(self, host):
+        with self.lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(
+                    self.failure_threshold, self.cooldown
+                )
+            return self.breakers[host]
+
+    def get_json(self, url, headers=None):
+        """
+        GET a url and decode its json, retrying transient failures with jittered backoff
+
+        Transport errors become UpstreamUnavailable once retries are exhausted.
+        """
+
+        host = urlparse(url).netloc
+        breaker = self.breaker(host)
+        timeout = self.timeouts.get(host, DEFAULT_TIMEOUT)
+        error = None
+
+        for attempt in range(self.retries + 1):
+            if not breaker.allow():
+                raise UpstreamUnavailable(f"circuit open for {host}")
+
+            if attempt:
+                # full jitter exponential backoff
+                time.sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+
+            try:
+                response = self.session.get(url, headers=headers, timeout=timeout)
+            except requests.RequestException as e:
+                # connection errors, timeouts, broken bodies and redirect loops
+                breaker.record_failure()
+                error = e
+                continue
+
+            if response.status_code in RETRY_STATUSES:
+                breaker.record_failure()
+                error = ResponseError(url, response.status_code, response.text)
+                continue
+
+            if not response.ok:
+                breaker.record_success()
+                raise ResponseError(url, response.status_code, response.text)
+
+            try:
+                data = response.json()
+            except ValueError:
+                # an error page served with a 200, usually a proxy in front of the host
+                breaker.record_failure()
+                raise ResponseError(url, response.status_code, response.text)
+
+            breaker.record_success()
+
+            return data
+
+        raise UpstreamUnavailable(
+            f"{url} failed after {self.retries + 1} attempts"
+        ) from error
+
+    def lcd_get(self, path):
+        """
+        GET an LCD path, hedging across mirrors when the first is slow
+        """
+
+        pending = set()
+        mirrors = list(self.lcd_mirrors)
+        error = None
+
+        while mirrors or pending:
+            if mirrors:
+                url = mirrors.pop(0) + path
+                pending.add(self.executor.submit(self.get_json, url))
+
+            done, pending = wait(
+                pending,
+                timeout=self.hedge_delay if mirrors else None,
+                return_when=FIRST_COMPLETED,
+            )
+
+            for future in done:
+                try:
+                    return future.result()
+                except ResponseError as e:
+                    # the query itself failed, another mirror will answer the same
+                    if e.status_code in QUERY_ERROR_STATUSES:
+                        raise
+                    error = e
+                except RequestFailed as e:
+                    error = e
+
+        raise UpstreamUnavailable(f"no LCD mirror answered {path}") from error
+
+
+def _from_settings(settings):
+    return HttpClient(**settings)
+
+
+client = HttpClient()
+
+
+def dict_to_b64(data: dict) -> str:
+    """Converts dict to ASCII-encoded base64 encoded string."""
+    return base64.b64encode(bytes(json.dumps(data), "ascii")).decode()
+
+
+def query_contract(contract, message):
+    """
+    Smart query a contract through the LCD mirrors and return the query result
+    """
+
+    response = client.lcd_get(
+        f"/terra/wasm/v1beta1/contracts/{contract}/store?query_msg={dict_to_b64(message)}"
+    )
+
+    return response["query_result"]
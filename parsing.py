@@ -0,0 +1,75 @@
+# ET symbols and the Prices field they fill
+PRICE_SYMBOLS = {"LUNA": "luna", "yLUNA": "yluna", "PRISM": "prism", "xPRISM": "xprism"}
+
+
+class Prices:
+    """
+    ET prices of the assets the farm calculator uses
+    """
+
+    __slots__ = ("luna", "yluna", "prism", "xprism")
+
+    def __init__(self, luna, yluna, prism, xprism):
+        self.luna = luna
+        self.yluna = yluna
+        self.prism = prism
+        self.xprism = xprism
+
+
+class OracleBalance:
+    """
+    Oracle reward balances in UST and LUNA
+    """
+
+    __slots__ = ("ust", "luna")
+
+    def __init__(self, ust, luna):
+        self.ust = ust
+        self.luna = luna
+
+
+def parse_prices(response):
+    """
+    Scan ET prices for LUNA, yLUNA, PRISM and xPRISM, stopping once all are found
+    """
+
+    entries = response["prices"]
+    if isinstance(entries, dict):
+        entries = entries.values()
+
+    found = {}
+    for entry in entries:
+        field = PRICE_SYMBOLS.get(entry["symbol"])
+        if field is not None:
+            found[field] = entry["price"]
+            if len(found) == len(PRICE_SYMBOLS):
+                break
+
+    missing = set(PRICE_SYMBOLS.values()) - set(found)
+    if missing:
+        raise KeyError(f"prices missing {sorted(missing)}")
+
+    return Prices(**found)
+
+
+def parse_oracle_balance(response):
+    """
+    Scan the oracle's bank balances for its uusd and uluna amounts
+    """
+
+    amounts = {}
+    for coin in response["result"]:
+        if coin["denom"] in ("uusd", "uluna"):
+            amounts[coin["denom"]] = int(coin["amount"]) / 1e6
+            if len(amounts) == 2:
+                break
+
+    return OracleBalance(ust=amounts["uusd"], luna=amounts["uluna"])
+
+
+def parse_bonded_tokens(response):
+    """
+    Read bonded tokens from the staking pool
+    """
+
+    return int(response["pool"]["bonded_tokens"]) / 1e6
@@ -0,0 +1,226 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from http_client import RequestFailed, query_contract
+
+FARM_CONTRACT = "terra1ns5nsvtdxu53dwdthy3yxs6x3w2hf3fclhzllc"
+AMPS_CONTRACT = "terra1pa4amk66q8punljptzmmftf6ylq3ezyzx6kl9m"
+
+# paginated list queries: (contract, query name, response list key, address field, amount fields)
+# these list queries are not confirmed against the deployed contracts' schemas
+FARM_STAKERS = (
+    FARM_CONTRACT,
+    "reward_infos",
+    "reward_infos",
+    "staker_addr",
+    {"yluna": "bond_amount"},
+)
+AMPS_STAKERS = (
+    AMPS_CONTRACT,
+    "get_boosts",
+    "boosts",
+    "user",
+    {"xprism": "amt_bonded", "amps": "total_boost"},
+)
+
+PAGE_LIMIT = 30
+
+# population mode stays off until the list queries are confirmed, POPULATION_MODE=1 opts in
+POPULATION_MODE = os.environ.get("POPULATION_MODE") == "1"
+
+
+class SchemaMismatch(RequestFailed):
+    """
+    A list query answered without the expected list key
+    """
+
+
+def iter_staker_pages(listing, start_after=None):
+    """
+    Page through a contract's stakers, yielding (last address, {address: amounts}) per page
+    """
+
+    contract, query_name, list_key, address_field, amount_fields = listing
+
+    while True:
+        message = {query_name: {"limit": PAGE_LIMIT}}
+        if start_after is not None:
+            message[query_name]["start_after"] = start_after
+
+        result = query_contract(contract, message)
+        if list_key not in result:
+            raise SchemaMismatch(
+                f"{query_name} on {contract} returned {sorted(result)}, "
+                f"expected {list_key}"
+            )
+        entries = result[list_key]
+
+        if not entries:
+            return
+
+        page = {
+            entry[address_field]: {
+                name: float(entry[field]) / 1e6 for name, field in amount_fields.items()
+            }
+            for entry in entries
+        }
+        start_after = entries[-1][address_field]
+
+        yield start_after, page
+
+        if len(entries) < PAGE_LIMIT:
+            return
+
+
+class StakerCache:
+    """
+    Staker state from the PRISM Farm and AMPS contracts, crawled in the background
+
+    A crawl fills its own dicts and replaces the published snapshot only once both contracts
+    are complete. A failed crawl keeps its cursors and its error, and is resumed after a backoff
+    that doubles with each consecutive failure, up to ttl.
+    """
+
+    def __init__(self, ttl=600, retry_after=30):
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.listings = {"farm": FARM_STAKERS, "amps": AMPS_STAKERS}
+
+        # published snapshot
+        self.entries = None
+        self.refreshed_at = None
+
+        # crawl in progress
+        self.crawl = None
+        self.thread = None
+        self.error = None
+        self.failures = 0
+        self.failed_at = None
+
+    def _new_crawl(self):
+        return {
+            "entries": {name: {} for name in self.listings},
+            "cursor": {name: None for name in self.listings},
+            "complete": {name: False for name in self.listings},
+        }
+
+    def _crawl_listing(self, crawl, name):
+        """
+        Page one contract from the crawl's cursor, recording each page as it arrives
+        """
+
+        for cursor, page in iter_staker_pages(
+            self.listings[name], crawl["cursor"][name]
+        ):
+            with self.lock:
+                crawl["entries"][name].update(page)
+                crawl["cursor"][name] = cursor
+
+        with self.lock:
+            crawl["complete"][name] = True
+
+    def _run(self, crawl):
+        """
+        Crawl both contracts concurrently, then publish the crawl as the new snapshot
+        """
+
+        pending = [name for name in self.listings if not crawl["complete"][name]]
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(self.listings)) as executor:
+                futures = [
+                    executor.submit(self._crawl_listing, crawl, name) for name in pending
+                ]
+                for future in futures:
+                    future.result()
+        except (RequestFailed, KeyError, TypeError, ValueError) as e:
+            with self.lock:
+                self.error = e
+                self.failures += 1
+                self.failed_at = time.time()
+            return
+
+        with self.lock:
+            self.entries = crawl["entries"]
+            self.refreshed_at = time.time()
+            self.crawl = None
+            self.error = None
+            self.failures = 0
+            self.failed_at = None
+
+    def refresh(self):
+        """
+        Start a background crawl if the snapshot is missing or older than ttl
+
+        The last error is kept until a crawl succeeds, and a failed crawl isn't retried
+        before its backoff has passed.
+        """
+
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+
+            fresh = self.refreshed_at is not None and (
+                time.time() - self.refreshed_at <= self.ttl
+            )
+            if fresh:
+                return
+
+            if self.failed_at is not None:
+                backoff = min(self.retry_after * 2 ** (self.failures - 1), self.ttl)
+                if time.time() - self.failed_at < backoff:
+                    return
+
+            # resume a failed crawl, otherwise start a new one
+            if self.crawl is None:
+                self.crawl = self._new_crawl()
+
+            self.thread = threading.Thread(
+                target=self._run, args=(self.crawl,), daemon=True
+            )
+            self.thread.start()
+
+    @property
+    def ready(self):
+        return self.entries is not None
+
+    @property
+    def crawled(self):
+        """
+        Stakers fetched so far by the crawl in progress
+        """
+
+        with self.lock:
+            if self.crawl is None:
+                return 0
+            return sum(len(entries) for entries in self.crawl["entries"].values())
+
+    def arrays(self, exclude=None):
+        """
+        Align the snapshot's farm and AMPS entries by address into yLUNA, xPRISM and AMPS arrays
+        """
+
+        with self.lock:
+            farm = self.entries["farm"]
+            amps = self.entries["amps"]
+
+        addresses = [address for address in farm if address != exclude]
+        yluna = np.array([farm[address]["yluna"] for address in addresses])
+        pledged = [amps.get(address, {}) for address in addresses]
+        xprism = np.array([entry.get("xprism", 0.0) for entry in pledged])
+        user_amps = np.array([entry.get("amps", 0.0) for entry in pledged])
+
+        return yluna, xprism, user_amps
+
+
+def total_weight(yluna, amps):
+    """
+    Exact boost pool weight as the sum of every staker's sqrt(yLUNA * AMPS)
+    """
+
+    return np.sqrt(yluna * amps).sum()
@@ -1,52 +1,52 @@
-import base64
-import json
-import requests
+import time
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
+from export import EXPORT_FORMATS
+from farm_model import (
+    DailySummary,
+    ParetoFrontier,
+    TopK,
+    compute_scenarios,
+    iter_scenario_chunks,
+    scenario_axes,
+    scenario_gradients,
+)
+from http_client import RequestFailed, ResponseError, client, query_contract
+from parsing import parse_bonded_tokens, parse_oracle_balance, parse_prices
+from population import POPULATION_MODE, StakerCache, total_weight
+
 
 @st.cache(show_spinner=False)
 def get_prices():
     """
-    Parse json data from ET into a DataFrame
+    Parse json data from ET into prices
     """
 
     url = "https://api.extraterrestrial.money/v1/api/prices"
 
-    response = requests.get(url).json()
-
-    df = pd.json_normalize(pd.DataFrame.from_dict(response)["prices"]).set_index(
-        "symbol"
-    )
-
-    luna_price = df.loc["LUNA", "price"]
-    yluna_price = df.loc["yLUNA", "price"]
-    prism_price = df.loc["PRISM", "price"]
-    xprism_price = df.loc["xPRISM", "price"]
+    prices = parse_prices(client.get_json(url))
 
-    return luna_price, yluna_price, prism_price, xprism_price
+    return prices.luna, prices.yluna, prices.prism, prices.xprism
 
 
 @st.cache(show_spinner=False)
 def get_oracle_rewards(luna_price):
 
     # oracle address
-    response = requests.get(
-        " https://lcd.terra.dev/bank/balances/terra1jgp27m8fykex4e4jtt0l7ze8q528ux2lh4zh0f",
-    ).json()
-
-    # convert to dataframe
-    df = pd.DataFrame.from_dict(response["result"]).set_index("denom")
+    response = client.lcd_get(
+        "/bank/balances/terra1jgp27m8fykex4e4jtt0l7ze8q528ux2lh4zh0f",
+    )
 
     # parse for ust and luna rewards
-    ust_rewards = int(df.loc["uusd", "amount"]) / 1e6
-    luna_rewards = int(df.loc["uluna", "amount"]) / 1e6
+    balance = parse_oracle_balance(response)
 
     # add ust and value of luna
-    oracle_rewards = ust_rewards + luna_rewards * luna_price
+    oracle_rewards = balance.ust + balance.luna * luna_price
 
     return oracle_rewards
 
@@ -55,15 +55,12 @@ def get_oracle_rewards(luna_price):
 def get_staked_luna():
 
     # staking pool
-    response = requests.get(
-        " https://lcd.terra.dev/cosmos/staking/v1beta1/pool",
-    ).json()
-
-    # convert to dataframe
-    df = pd.DataFrame.from_dict(response)
+    response = client.lcd_get(
+        "/cosmos/staking/v1beta1/pool",
+    )
 
     # parse number of staked luna
-    staked_luna = round(int(df.loc["bonded_tokens", "pool"]) / 1e6, -6)
+    staked_luna = round(parse_bonded_tokens(response), -6)
 
     return staked_luna
 
@@ -84,24 +81,16 @@ def get_staking_yield(luna_price, staked_luna):
     return staking_yield
 
 
-def dict_to_b64(data: dict) -> str:
-    """Converts dict to ASCII-encoded base64 encoded string."""
-    return base64.b64encode(bytes(json.dumps(data), "ascii")).decode()
-
-
 # query xPRISM balance in AMPS vault
 @st.cache(show_spinner=False)
 def get_amps_vault_xprism():
 
-    query_message = dict_to_b64(
-        {"balance": {"address": "terra1pa4amk66q8punljptzmmftf6ylq3ezyzx6kl9m"}}
+    query_result = query_contract(
+        "terra1042wzrwg2uk6jqxjm34ysqquyr9esdgm5qyswz",
+        {"balance": {"address": "terra1pa4amk66q8punljptzmmftf6ylq3ezyzx6kl9m"}},
     )
 
-    response = requests.get(
-        f"https://lcd.terra.dev/terra/wasm/v1beta1/contracts/terra1042wzrwg2uk6jqxjm34ysqquyr9esdgm5qyswz/store?query_msg={query_message}",
-    ).json()
-
-    xprism_balance = float(response["query_result"]["balance"]) / 1e6
+    xprism_balance = float(query_result["balance"]) / 1e6
 
     return xprism_balance
 
@@ -110,14 +99,13 @@ def get_amps_vault_xprism():
 @st.cache(show_spinner=False)
 def get_user_amps(user_address):
 
-    query_message = dict_to_b64({"get_boost": {"user": user_address}})
-
-    response = requests.get(
-        f"https://lcd.terra.dev/terra/wasm/v1beta1/contracts/terra1pa4amk66q8punljptzmmftf6ylq3ezyzx6kl9m/store?query_msg={query_message}",
-    ).json()
+    query_result = query_contract(
+        "terra1pa4amk66q8punljptzmmftf6ylq3ezyzx6kl9m",
+        {"get_boost": {"user": user_address}},
+    )
 
-    user_xprism = float(response["query_result"]["amt_bonded"]) / 1e6
-    user_amps = float(response["query_result"]["total_boost"]) / 1e6
+    user_xprism = float(query_result["amt_bonded"]) / 1e6
+    user_amps = float(query_result["total_boost"]) / 1e6
 
     return user_xprism, user_amps
 
@@ -126,14 +114,13 @@ def get_user_amps(user_address):
 @st.cache(show_spinner=False)
 def get_user_prism_farm(user_address):
 
-    query_message = dict_to_b64({"reward_info": {"staker_addr": user_address}})
-
-    response = requests.get(
-        f"https://lcd.terra.dev/terra/wasm/v1beta1/contracts/terra1ns5nsvtdxu53dwdthy3yxs6x3w2hf3fclhzllc/store?query_msg={query_message}",
-    ).json()
+    query_result = query_contract(
+        "terra1ns5nsvtdxu53dwdthy3yxs6x3w2hf3fclhzllc",
+        {"reward_info": {"staker_addr": user_address}},
+    )
 
-    user_yluna = float(response["query_result"]["bond_amount"]) / 1e6
-    user_weight = float(response["query_result"]["boost_weight"]) / 1e6
+    user_yluna = float(query_result["bond_amount"]) / 1e6
+    user_weight = float(query_result["boost_weight"]) / 1e6
 
     return user_yluna, user_weight
 
@@ -142,15 +129,12 @@ def get_user_prism_farm(user_address):
 @st.cache(show_spinner=False)
 def get_yluna_staked():
 
-    query_message = dict_to_b64(
-        {"reward_info": {"staker_addr": "terra1ns5nsvtdxu53dwdthy3yxs6x3w2hf3fclhzllc"}}
+    query_result = query_contract(
+        "terra1p7jp8vlt57cf8qwazjg58qngwvarmszsamzaru",
+        {"reward_info": {"staker_addr": "terra1ns5nsvtdxu53dwdthy3yxs6x3w2hf3fclhzllc"}},
     )
 
-    response = requests.get(
-        f"https://lcd.terra.dev/terra/wasm/v1beta1/contracts/terra1p7jp8vlt57cf8qwazjg58qngwvarmszsamzaru/store?query_msg={query_message}",
-    ).json()
-
-    yluna_staked = float(response["query_result"]["staked_amount"]) / 1e6
+    yluna_staked = float(query_result["staked_amount"]) / 1e6
 
     return yluna_staked
 
@@ -159,17 +143,64 @@ def get_yluna_staked():
 @st.cache(show_spinner=False)
 def get_total_boost_weight():
 
-    query_message = dict_to_b64({"distribution_status": {}})
-
-    response = requests.get(
-        f"https://lcd.terra.dev/terra/wasm/v1beta1/contracts/terra1ns5nsvtdxu53dwdthy3yxs6x3w2hf3fclhzllc/store?query_msg={query_message}",
-    ).json()
+    query_result = query_contract(
+        "terra1ns5nsvtdxu53dwdthy3yxs6x3w2hf3fclhzllc",
+        {"distribution_status": {}},
+    )
 
-    total_boost_weight = float(response["query_result"]["boost"]["total_weight"]) / 1e6
+    total_boost_weight = float(query_result["boost"]["total_weight"]) / 1e6
 
     return total_boost_weight
 
 
+def cached_export(name, scenario_key, export_format, columns):
+    """
+    Serialize an export once per scenario key and format, columns is called only when needed
+    """
+
+    exports = st.session_state.setdefault("exports", {})
+    export_key = (scenario_key, export_format)
+
+    if name not in exports or exports[name][0] != export_key:
+        serialize = EXPORT_FORMATS[export_format][0]
+        exports[name] = (export_key, serialize(columns()))
+
+    return exports[name][1]
+
+
+# streaming grid limits
+MAX_STREAMING_SCENARIOS = 50_000_000
+REDRAW_SECONDS = 1.0
+
+# staker state shared across reruns and sessions
+@st.cache(allow_output_mutation=True, show_spinner=False)
+def get_staker_cache():
+
+    return StakerCache()
+
+
+def frontier_figure(frontier):
+    """
+    Plot the Pareto frontier of position size vs. daily rewards
+    """
+
+    return px.line(
+        data_frame=frontier,
+        x="position_size",
+        y="new_daily_rewards",
+        markers=True,
+        template="plotly_dark",
+        hover_data=["day", "new_user_yluna", "new_user_xprism", "new_total_apr"],
+        labels={
+            "position_size": "Pos. Value",
+            "new_daily_rewards": "Daily PRISM Rewards",
+            "new_total_apr": "Total APR",
+            "new_user_yluna": "yLUNA",
+            "new_user_xprism": "xPRISM",
+        },
+    )
+
+
 # initial parameters
 luna_price, yluna_price, prism_price, xprism_price = get_prices()
 staked_luna = get_staked_luna()
@@ -178,38 +209,88 @@ yluna_yield = (luna_price / yluna_price) * staking_yield
 
 st.sidebar.header("User Inputs")
 
-# sidebar assumptions
-user_address = st.sidebar.text_input(
-    "Wallet Address", value="terra1376ghe2yntgxdct36chx83lrrva9jrrfym2j2p"
-)
-
-
-# asset prices
-with st.sidebar.expander("Asset Prices", expanded=True):
+# sidebar assumptions, submitted in batches so typing doesn't rerun the app
+with st.sidebar.form("wallet"):
 
-    luna_price_input = st.number_input(
-        "Luna",
-        min_value=0.0,
-        value=luna_price,
-        step=luna_price * 0.01,
-        format="%0.2f",
+    user_address = st.text_input(
+        "Wallet Address", value="terra1376ghe2yntgxdct36chx83lrrva9jrrfym2j2p"
     )
 
-    yluna_price = st.number_input(
-        "yLUNA",
-        min_value=0.0,
-        value=yluna_price,
-        step=yluna_price * 0.01,
-        format="%0.2f",
-    )
-
-    prism_price = st.number_input(
-        "Prism",
-        min_value=0.0,
-        value=prism_price,
-        step=prism_price * 0.01,
-        format="%0.3f",
-    )
+    st.form_submit_button("Load Wallet")
+
+
+with st.sidebar.form("assumptions"):
+
+    # asset prices
+    with st.expander("Asset Prices", expanded=True):
+
+        luna_price_input = st.number_input(
+            "Luna",
+            min_value=0.0,
+            value=luna_price,
+            step=luna_price * 0.01,
+            format="%0.2f",
+        )
+
+        yluna_price = st.number_input(
+            "yLUNA",
+            min_value=0.0,
+            value=yluna_price,
+            step=yluna_price * 0.01,
+            format="%0.2f",
+        )
+
+        prism_price = st.number_input(
+            "Prism",
+            min_value=0.0,
+            value=prism_price,
+            step=prism_price * 0.01,
+            format="%0.3f",
+        )
+
+    # scenario grid
+    with st.expander("Scenario Grid"):
+
+        streaming_mode = st.checkbox(
+            "Streaming Mode",
+            value=False,
+            help="Evaluate a larger grid in chunks and keep only the best allocations.",
+        )
+
+        grid_step = st.number_input(
+            "Step (% of Position)",
+            min_value=0.1,
+            max_value=10.0,
+            value=10.0,
+            step=0.5,
+            format="%0.1f",
+        )
+
+        max_day = st.number_input(
+            "Days Pledged",
+            min_value=1,
+            max_value=365,
+            value=14,
+        )
+
+        chunk_size = st.number_input(
+            "Chunk Size",
+            min_value=1_000,
+            max_value=1_000_000,
+            value=100_000,
+            step=10_000,
+        )
+
+        # hidden until the contracts' staker list queries are confirmed
+        population_mode = POPULATION_MODE and st.checkbox(
+            "Population Mode (Experimental)",
+            value=False,
+            help="Project every staker's weight from the farm and AMPS contracts instead of the pool totals. The contracts' staker list queries are unverified.",
+        )
+
+        export_format = st.selectbox("Export Format", list(EXPORT_FORMATS))
+
+    st.form_submit_button("Apply")
 
 
 # updated parameters
@@ -257,11 +338,14 @@ total_amps = total_boost_weight**2 / yluna_staked
 try:
     user_xprism, user_amps = get_user_amps(user_address)
     user_yluna, user_weight = get_user_prism_farm(user_address)
-except:
+except (ResponseError, KeyError):
     st.warning(
         "Please enter a wallet address that is particpating in the PRISM Farm and AMPS Vault."
     )
     st.stop()
+except RequestFailed:
+    st.error("The Terra LCD is not responding, please try again in a moment.")
+    st.stop()
 
 current_position_size = (user_yluna * yluna_price) + (user_xprism * xprism_price)
 
@@ -285,88 +369,203 @@ col6.metric(label="Base APR", value=f"{base_apr:,.2f}%")
 col7.metric(label="Boost APR", value=f"{boost_apr:,.2f}%")
 col8.metric(label="Total APR", value=f"{total_apr:,.2f}%")
 
-# range of yluna values + original yluna value
-yluna_range = np.arange(user_yluna * 0.5, user_yluna * 5, user_yluna * 0.1).tolist()
-
-# range of xprism values + original xprism value
-xprism_range = np.arange(
-    user_xprism * 0.5, user_xprism * 10, user_xprism * 0.1
-).tolist()
-
-# append current position to ranges
-yluna_range.append(user_yluna)
-xprism_range.append(user_xprism)
-
-# new records after 1 day
-records = []
+# protocol and price state shared by every scenario
+farm_state = {
+    "yluna_price": yluna_price,
+    "xprism_price": xprism_price,
+    "prism_price": prism_price,
+    "yluna_staked": yluna_staked,
+    "xprism_pledged": xprism_pledged,
+    "total_amps": total_amps,
+    "user_yluna": user_yluna,
+    "user_xprism": user_xprism,
+    "user_amps": user_amps,
+}
+
+if population_mode:
+
+    # the crawl runs in the background, pool totals are used until a snapshot exists
+    staker_cache = get_staker_cache()
+    staker_cache.refresh()
+
+    if staker_cache.error is not None:
+        st.warning(
+            f"Could not load PRISM Farm stakers ({staker_cache.error}). "
+            + (
+                "Using the last complete snapshot."
+                if staker_cache.ready
+                else "Using the pool totals instead."
+            )
+        )
+    elif not staker_cache.ready:
+        st.info(
+            f"Loading PRISM Farm stakers in the background ({staker_cache.crawled:,} so far). "
+            "Using the pool totals until the crawl completes."
+        )
 
-for new_user_yluna in yluna_range:
-    for new_user_xprism in xprism_range:
-        for day in range(1, 15, 1):
+if population_mode and staker_cache.ready:
 
-            position_size = new_user_yluna * yluna_price + (
-                new_user_xprism * xprism_price
-            )
+    others_yluna, others_xprism, others_amps = staker_cache.arrays(
+        exclude=user_address
+    )
 
-            new_yluna_staked = yluna_staked + new_user_yluna - user_yluna
+    # every other staker, projected exactly at each scenario's days pledged
+    farm_state["others_yluna"] = others_yluna
+    farm_state["others_xprism"] = others_xprism
+    farm_state["others_amps"] = others_amps
 
-            # reset AMPS if xprism is unpledged
-            if new_user_xprism < user_xprism:
-                new_user_amps = (day * 0.49992) * new_user_xprism
-            else:
-                new_user_amps = (day * 0.49992) * new_user_xprism + user_amps
+    st.caption(
+        f"Total boost weight from {len(others_yluna) + 1:,} stakers: "
+        f"{total_weight(others_yluna, others_amps) + user_weight:,.0f}"
+    )
 
-            new_user_weight = (new_user_yluna * new_user_amps) ** (1 / 2)
+# marginal value of the current position, from the analytic gradients
+st.subheader("Marginal Value")
+st.markdown(
+    "Additional daily rewards in USD and total APR from one more yLUNA staked, xPRISM pledged, or day pledged, "
+    "after the first day pledged."
+)
 
-            new_total_amps = (day * 0.49992) * (
-                xprism_pledged + new_user_xprism
-            ) + total_amps
-            new_total_weight = (new_yluna_staked * new_total_amps) ** (1 / 2)
+# day 1 is the first day of the scenario grid, at day 0 a position without AMPS has no
+# boost weight and its marginal values are undefined
+gradients = scenario_gradients(user_yluna, user_xprism, 1, farm_state)
+
+col9, col10, col11 = st.columns(3)
+
+for col, name, label in [
+    (col9, "yluna", "Per yLUNA"),
+    (col10, "xprism", "Per xPRISM"),
+    (col11, "day", "Per Day Pledged"),
+]:
+    col.metric(
+        label=label,
+        value=f"${float(gradients['daily_rewards'][name]):,.4f}",
+        delta=f"{float(gradients['total_apr'][name]):,.4f}% APR",
+    )
 
-            new_base_rewards = 104_000_000 * new_user_yluna / new_yluna_staked
-            new_base_apr = (
-                (new_base_rewards * prism_price) / (new_user_yluna * yluna_price) * 100
-            )
+# only rebuild scenarios and figures when their submitted inputs change
+scenario_key = (
+    tuple((name, value) for name, value in farm_state.items() if np.isscalar(value)),
+    population_mode and get_staker_cache().refreshed_at,
+    streaming_mode,
+    # grid settings only shape the streaming grid
+    (grid_step, max_day, chunk_size) if streaming_mode else None,
+)
+scenarios_changed = st.session_state.get("scenario_key") != scenario_key
 
-            new_boost_rewards = 26_000_000 * new_user_weight / new_total_weight
-            new_boost_apr = (
-                (new_boost_rewards * prism_price) / (new_user_yluna * yluna_price) * 100
-            )
+_, extension, mime = EXPORT_FORMATS[export_format]
 
-            new_total_apr = new_base_apr + new_boost_apr
-            new_daily_rewards = (
-                (new_base_rewards + new_boost_rewards) * prism_price / 365
-            )
+if streaming_mode:
 
-            ratio = new_user_xprism / new_user_yluna
-
-            eff = (position_size**2 + new_daily_rewards**2) ** (1 / 2)
-
-            # append all the data to the records list
-            records.append(
-                {
-                    "day": day,
-                    "position_size": position_size,
-                    "new_user_yluna": new_user_yluna,
-                    "new_user_xprism": new_user_xprism,
-                    "new_yluna_staked": new_yluna_staked,
-                    "new_user_amps": new_user_amps,
-                    "new_user_weight": new_user_weight,
-                    "new_total_amps": new_total_amps,
-                    "new_total_weight": new_total_weight,
-                    "new_base_rewards": new_base_rewards,
-                    "new_base_apr": new_base_apr,
-                    "new_boost_rewards": new_boost_rewards,
-                    "new_boost_apr": new_boost_apr,
-                    "new_total_apr": new_total_apr,
-                    "new_daily_rewards": new_daily_rewards,
-                    "ratio": ratio,
-                    "eff": eff,
-                }
-            )
+    yluna_axis, xprism_axis, day_axis = scenario_axes(
+        user_yluna, user_xprism, step=grid_step / 100, max_day=max_day
+    )
+    n_scenarios = len(yluna_axis) * len(xprism_axis) * len(day_axis)
+
+    if n_scenarios > MAX_STREAMING_SCENARIOS:
+        st.error(
+            f"{n_scenarios:,} combinations is more than the {MAX_STREAMING_SCENARIOS:,} limit. "
+            "Increase the step or reduce the days pledged."
+        )
+        st.stop()
+
+    st.subheader("Best Allocations")
+    st.markdown(
+        f"""
+        {n_scenarios:,} combinations of yLUNA, xPRISM, and days pledged are evaluated in chunks, keeping only the best allocations in memory.
+
+        The Pareto frontier shows the positions where no smaller position earns more daily PRISM rewards.
+        """
+    )
 
-# create a dataframe from the records list
-df = pd.DataFrame(records)
+    frontier_placeholder = st.empty()
+    top_k_placeholder = st.empty()
+    summary_placeholder = st.empty()
+
+    if scenarios_changed:
+
+        top_k = TopK(k=25)
+        frontier = ParetoFrontier()
+        daily_summary = DailySummary(day_axis)
+
+        progress = st.progress(0.0)
+
+        rows_done = 0
+        redrawn_at = 0.0
+        for chunk in iter_scenario_chunks(
+            yluna_axis, xprism_axis, day_axis, farm_state, chunk_size=chunk_size
+        ):
+            top_k.update(chunk)
+            frontier.update(chunk)
+            daily_summary.update(chunk)
+
+            rows_done += len(chunk)
+            progress.progress(rows_done / n_scenarios)
+
+            # partial results, at most once per redraw interval and after the last chunk
+            if (
+                rows_done < n_scenarios
+                and time.monotonic() - redrawn_at < REDRAW_SECONDS
+            ):
+                continue
+            redrawn_at = time.monotonic()
+
+            frontier_chart = frontier_figure(frontier.result())
+            top_table = top_k.result()[
+                [
+                    "day",
+                    "position_size",
+                    "new_user_yluna",
+                    "new_user_xprism",
+                    "new_total_apr",
+                    "new_daily_rewards",
+                ]
+            ]
+            summary_table = daily_summary.result()
+
+            frontier_placeholder.plotly_chart(frontier_chart, use_container_width=True)
+            top_k_placeholder.dataframe(top_table)
+            summary_placeholder.dataframe(summary_table)
+
+        results = {"frontier": frontier.result(), "top": top_k.result()}
+
+        st.session_state["scenario_key"] = scenario_key
+        st.session_state["best_allocations"] = (
+            frontier_chart,
+            top_table,
+            summary_table,
+            results,
+        )
+
+    else:
+
+        frontier_chart, top_table, summary_table, results = st.session_state[
+            "best_allocations"
+        ]
+
+        frontier_placeholder.plotly_chart(frontier_chart, use_container_width=True)
+        top_k_placeholder.dataframe(top_table)
+        summary_placeholder.dataframe(summary_table)
+
+    # export the frontier and top allocations
+    for name, result in results.items():
+        st.download_button(
+            label=f"Download {name.title()} ({export_format})",
+            data=cached_export(
+                name,
+                scenario_key,
+                export_format,
+                lambda: {column: result[column].to_numpy() for column in result},
+            ),
+            file_name=f"prism_farm_{name}.{extension}",
+            mime=mime,
+        )
+
+    # disclaimer
+    st.info(
+        "This tool was created for educational purposes only, not financial advice."
+    )
+    st.stop()
 
 # plot APRs
 st.subheader("Daily Rewards vs. Total APR")
@@ -382,51 +581,83 @@ st.markdown(
     """
 )
 
-chart = px.scatter(
-    data_frame=df,
-    x="new_daily_rewards",
-    y="new_total_apr",
-    color="position_size",
-    animation_frame="day",
-    animation_group="position_size",
-    # range_color=[50, 400],
-    # size="new_daily_rewards",
-    template="plotly_dark",
-    color_continuous_scale="Viridis",
-    hover_data=["new_user_yluna", "new_user_xprism", "ratio", "new_user_amps"],
-    labels={
-        "ratio": "Ratio",
-        "position_size": "Pos. Value",
-        "new_total_apr": "Total APR",
-        "new_user_yluna": "yLUNA",
-        "new_user_xprism": "xPRISM",
-        "new_daily_rewards": "Daily PRISM Rewards",
-        "new_user_amps": "AMPS",
-    },
-    range_y=[df["new_total_apr"].min() - 2.5, df["new_total_apr"].max() + 2.5],
-)
+if scenarios_changed:
+
+    yluna_axis, xprism_axis, day_axis = scenario_axes(user_yluna, user_xprism)
 
-chart.add_trace(
-    go.Scatter(
-        x=df[df["new_user_yluna"] == user_yluna]["new_daily_rewards"].to_list(),
-        y=df[df["new_user_yluna"] == user_yluna]["new_total_apr"].to_list(),
-        mode="lines",
-        line=dict(color="white"),
-        hoverinfo="skip",
-        showlegend=False,
+    # every combination of yluna, xprism and days pledged
+    yluna_grid, xprism_grid, day_grid = np.meshgrid(
+        yluna_axis, xprism_axis, day_axis, indexing="ij"
     )
-)
 
-chart.add_annotation(
-    x=current_daily_rewards,
-    y=total_apr,
-    text="Current yLUNA Staked",
-    showarrow=True,
-)
+    scenario_columns = compute_scenarios(
+        yluna_grid.ravel(), xprism_grid.ravel(), day_grid.ravel(), farm_state
+    )
+
+    df = pd.DataFrame(scenario_columns)
+
+    chart = px.scatter(
+        data_frame=df,
+        x="new_daily_rewards",
+        y="new_total_apr",
+        color="position_size",
+        animation_frame="day",
+        animation_group="position_size",
+        # range_color=[50, 400],
+        # size="new_daily_rewards",
+        template="plotly_dark",
+        color_continuous_scale="Viridis",
+        hover_data=["new_user_yluna", "new_user_xprism", "ratio", "new_user_amps"],
+        labels={
+            "ratio": "Ratio",
+            "position_size": "Pos. Value",
+            "new_total_apr": "Total APR",
+            "new_user_yluna": "yLUNA",
+            "new_user_xprism": "xPRISM",
+            "new_daily_rewards": "Daily PRISM Rewards",
+            "new_user_amps": "AMPS",
+        },
+        range_y=[df["new_total_apr"].min() - 2.5, df["new_total_apr"].max() + 2.5],
+    )
+
+    chart.add_trace(
+        go.Scatter(
+            x=df[df["new_user_yluna"] == user_yluna]["new_daily_rewards"].to_list(),
+            y=df[df["new_user_yluna"] == user_yluna]["new_total_apr"].to_list(),
+            mode="lines",
+            line=dict(color="white"),
+            hoverinfo="skip",
+            showlegend=False,
+        )
+    )
+
+    chart.add_annotation(
+        x=current_daily_rewards,
+        y=total_apr,
+        text="Current yLUNA Staked",
+        showarrow=True,
+    )
+
+    st.session_state["scenario_key"] = scenario_key
+    st.session_state["scenario_chart"] = (chart, scenario_columns)
+
+else:
+
+    chart, scenario_columns = st.session_state["scenario_chart"]
 
 
 st.plotly_chart(chart, use_container_width=True)
 
+st.download_button(
+    label=f"Download Scenarios ({export_format})",
+    # the scenario table straight from the computed columns
+    data=cached_export(
+        "scenarios", scenario_key, export_format, lambda: scenario_columns
+    ),
+    file_name=f"prism_farm_scenarios.{extension}",
+    mime=mime,
+)
+
 
 # disclaimer
 st.info("This tool was created for educational purposes only, not financial advice.")
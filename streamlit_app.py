@@ -1,7 +1,21 @@
-import requests
+import numpy as np
 import pandas as pd
+import plotly.express as px
 import streamlit as st
 
+from export import EXPORT_FORMATS
+from http_client import client
+from parsing import parse_bonded_tokens, parse_oracle_balance
+from valuation import (
+    GOAL_SEEK_METRICS,
+    GOAL_SEEK_VARIABLES,
+    goal_seek,
+    goal_seek_variables,
+    valuation,
+    vault_arrays,
+    vault_table,
+)
+
 risk_free_rate = 0.195
 luna_ust_address = "terra1m6ywlgn6wrjuagcmmezzz2a029gtldhey5k552"
 beth_ust_address = "terra1c0afrdc5253tkp5wt7rxhuj42xwyf2lcre0s7c"
@@ -27,9 +41,9 @@ def get_price(pair_address):
     }
 
     # coinhall api
-    response = requests.get(
+    response = client.get_json(
         "https://api.coinhall.org/api/v1/charts/terra/pairs", headers=headers
-    ).json()
+    )
 
     # convert to dataframe
     df = (
@@ -65,19 +79,15 @@ def get_price(pair_address):
 def get_oracle_rewards(luna_price):
 
     # oracle address
-    response = requests.get(
-        " https://lcd.terra.dev/bank/balances/terra1jgp27m8fykex4e4jtt0l7ze8q528ux2lh4zh0f",
-    ).json()
-
-    # convert to dataframe
-    df = pd.DataFrame.from_dict(response["result"]).set_index("denom")
+    response = client.lcd_get(
+        "/bank/balances/terra1jgp27m8fykex4e4jtt0l7ze8q528ux2lh4zh0f",
+    )
 
     # parse for ust and luna rewards
-    ust_rewards = int(df.loc["uusd", "amount"]) / 1e6
-    luna_rewards = int(df.loc["uluna", "amount"]) / 1e6
+    balance = parse_oracle_balance(response)
 
     # add ust and value of luna
-    oracle_rewards = ust_rewards + luna_rewards * luna_price
+    oracle_rewards = balance.ust + balance.luna * luna_price
 
     return oracle_rewards
 
@@ -86,15 +96,12 @@ def get_oracle_rewards(luna_price):
 def get_staked_luna():
 
     # staking pool
-    response = requests.get(
-        " https://lcd.terra.dev/cosmos/staking/v1beta1/pool",
-    ).json()
-
-    # convert to dataframe
-    df = pd.DataFrame.from_dict(response)
+    response = client.lcd_get(
+        "/cosmos/staking/v1beta1/pool",
+    )
 
     # parse number of staked luna
-    staked_luna = round(int(df.loc["bonded_tokens", "pool"]) / 1e6, -6)
+    staked_luna = round(parse_bonded_tokens(response), -6)
 
     return staked_luna
 
@@ -127,159 +134,163 @@ eth_price = get_price(beth_ust_address)
 st.sidebar.header("Assumptions")
 st.sidebar.write("Exand the following sections to change your assumptions.")
 
-with st.sidebar.expander("PRISM", expanded=True):
-
-    prism_price = st.number_input(
-        label="PRISM Price", min_value=0.0, step=0.1, value=1.0, format="%.2f"
-    )
-
-    circulating_supply = st.number_input(
-        label="Circulating Supply (Millions)",
-        min_value=70,
-        max_value=1_000,
-        value=70,
-        help="First year circulating supply of 333m tokens.  Max of 1b tokens.",
-    )
-
-    percent_prism_staked = st.slider(
-        label="PRISM Staked",
-        min_value=0.0,
-        max_value=100.0,
-        value=75.0,
-        help="Amount of circulating PRISM that is staked.",
-        format="%.0f%%",
-    )
-
-
-with st.sidebar.expander("LUNA", expanded=True):
-
-    staked_luna = st.number_input(
-        label="Total Staked",
-        min_value=100.0,
-        step=100_000.0,
-        value=staked_luna,
-        format="%.2d",
-        help="Total amount of LUNA Staked.",
-    )
-
-    luna_price = st.number_input(
-        label="Price",
-        min_value=1.0,
-        step=1.0,
-        value=luna_price,
-        format="%.0d",
-    )
-
-    luna_yield = st.slider(
-        label="Staking Yield",
-        min_value=1.0,
-        max_value=20.0,
-        value=staking_yield + 1,
-        format="%.1f%%",
-        help="Yield after validator commissions, including airdrops.",
-    )
-
-    luna_market_share = st.slider(
-        label="Staked Market Share",
-        min_value=1,
-        max_value=100,
-        value=10,
-        format="%d%%",
-        help="Percent share of all staked LUNA.",
-    )
-
-    yluna_staked = st.slider(
-        label="yLUNA Staked",
-        min_value=1,
-        max_value=100,
-        value=90,
-        format="%d%%",
-        help="yLUNA used for LP farms will receive swap fees and PRISM incentives but not receive staking rewards.",
-    )
-
-with st.sidebar.expander("bETH"):
-
-    staked_eth = st.number_input(
-        label="Total Staked",
-        min_value=100.0,
-        step=1_000.0,
-        value=148_000.0,
-        format="%.2d",
-        help="Total amount of ETH Staked.",
-    )
-
-    eth_price = st.number_input(
-        label="Price",
-        min_value=1.0,
-        step=10.0,
-        value=eth_price,
-        format="%.2d",
-    )
-
-    eth_yield = st.slider(
-        label="Staking Yield",
-        min_value=1.0,
-        max_value=20.0,
-        value=5.0,
-        format="%.1f%%",
-    )
-
-    eth_market_share = st.slider(
-        label="Staked ETH Market Share",
-        min_value=1,
-        max_value=100,
-        value=10,
-        format="%d%%",
-        help="Percent share of all staked ETH.",
-    )
-
-    yeth_staked = st.slider(
-        label="yETH Staked",
-        min_value=1,
-        max_value=100,
-        value=90,
-        format="%d%%",
-        help="yETH used for LP farms will receive swap fees and PRISM incentives but not receive staking rewards.",
-    )
-
-with st.sidebar.expander("Liquidity Providers"):
-
-    total_lp = st.number_input(
-        label="Total Liquidity on Terra (Billions)",
-        min_value=0.5,
-        step=0.1,
-        value=2.0,
-        format="%.1f",
-        help="Total volume of all swaps on Terra.",
-    )
-
-    lp_yield = st.slider(
-        label="Average LP APR",
-        min_value=1.0,
-        max_value=100.0,
-        value=50.0,
-        format="%.1f%%",
-        help="Includes swap fees and LP incentives.",
-    )
-
-    lp_market_share = st.slider(
-        label="LP Market Share",
-        min_value=0.0,
-        max_value=10.0,
-        value=5.0,
-        step=0.1,
-        format="%.1f%%",
-        help="Percent share of all swaps on Terra.",
-    )
-
-    ylp_staked = st.slider(
-        label="yLP Staked",
-        min_value=1,
-        max_value=100,
-        value=90,
-        format="%d%%",
-        help="yLP used for LP farms will receive swap fees and PRISM incentives but not receive staking rewards.",
-    )
+# submitted in one batch so typing doesn't rerun the app
+with st.sidebar.form("assumptions"):
+
+    with st.expander("PRISM", expanded=True):
+
+        prism_price = st.number_input(
+            label="PRISM Price", min_value=0.0, step=0.1, value=1.0, format="%.2f"
+        )
+
+        circulating_supply = st.number_input(
+            label="Circulating Supply (Millions)",
+            min_value=70,
+            max_value=1_000,
+            value=70,
+            help="First year circulating supply of 333m tokens.  Max of 1b tokens.",
+        )
+
+        percent_prism_staked = st.slider(
+            label="PRISM Staked",
+            min_value=0.0,
+            max_value=100.0,
+            value=75.0,
+            help="Amount of circulating PRISM that is staked.",
+            format="%.0f%%",
+        )
+
+    with st.expander("LUNA", expanded=True):
+
+        staked_luna = st.number_input(
+            label="Total Staked",
+            min_value=100.0,
+            step=100_000.0,
+            value=staked_luna,
+            format="%.2d",
+            help="Total amount of LUNA Staked.",
+        )
+
+        luna_price = st.number_input(
+            label="Price",
+            min_value=1.0,
+            step=1.0,
+            value=luna_price,
+            format="%.0d",
+        )
+
+        luna_yield = st.slider(
+            label="Staking Yield",
+            min_value=1.0,
+            max_value=20.0,
+            value=staking_yield + 1,
+            format="%.1f%%",
+            help="Yield after validator commissions, including airdrops.",
+        )
+
+        luna_market_share = st.slider(
+            label="Staked Market Share",
+            min_value=1,
+            max_value=100,
+            value=10,
+            format="%d%%",
+            help="Percent share of all staked LUNA.",
+        )
+
+        yluna_staked = st.slider(
+            label="yLUNA Staked",
+            min_value=1,
+            max_value=100,
+            value=90,
+            format="%d%%",
+            help="yLUNA used for LP farms will receive swap fees and PRISM incentives but not receive staking rewards.",
+        )
+
+    with st.expander("bETH"):
+
+        staked_eth = st.number_input(
+            label="Total Staked",
+            min_value=100.0,
+            step=1_000.0,
+            value=148_000.0,
+            format="%.2d",
+            help="Total amount of ETH Staked.",
+        )
+
+        eth_price = st.number_input(
+            label="Price",
+            min_value=1.0,
+            step=10.0,
+            value=eth_price,
+            format="%.2d",
+        )
+
+        eth_yield = st.slider(
+            label="Staking Yield",
+            min_value=1.0,
+            max_value=20.0,
+            value=5.0,
+            format="%.1f%%",
+        )
+
+        eth_market_share = st.slider(
+            label="Staked ETH Market Share",
+            min_value=1,
+            max_value=100,
+            value=10,
+            format="%d%%",
+            help="Percent share of all staked ETH.",
+        )
+
+        yeth_staked = st.slider(
+            label="yETH Staked",
+            min_value=1,
+            max_value=100,
+            value=90,
+            format="%d%%",
+            help="yETH used for LP farms will receive swap fees and PRISM incentives but not receive staking rewards.",
+        )
+
+    with st.expander("Liquidity Providers"):
+
+        total_lp = st.number_input(
+            label="Total Liquidity on Terra (Billions)",
+            min_value=0.5,
+            step=0.1,
+            value=2.0,
+            format="%.1f",
+            help="Total volume of all swaps on Terra.",
+        )
+
+        lp_yield = st.slider(
+            label="Average LP APR",
+            min_value=1.0,
+            max_value=100.0,
+            value=50.0,
+            format="%.1f%%",
+            help="Includes swap fees and LP incentives.",
+        )
+
+        lp_market_share = st.slider(
+            label="LP Market Share",
+            min_value=0.0,
+            max_value=10.0,
+            value=5.0,
+            step=0.1,
+            format="%.1f%%",
+            help="Percent share of all swaps on Terra.",
+        )
+
+        ylp_staked = st.slider(
+            label="yLP Staked",
+            min_value=1,
+            max_value=100,
+            value=90,
+            format="%d%%",
+            help="yLP used for LP farms will receive swap fees and PRISM incentives but not receive staking rewards.",
+        )
+
+    st.form_submit_button("Apply")
 
 st.markdown("# PRISM Protocol Valuation Calculator")
 st.markdown(
@@ -293,91 +304,97 @@ st.info(
     "To support more community tools like this, consider delegating to the [GT Capital Validator](https://station.terra.money/validator/terravaloper1rn9grwtg4p3f30tpzk8w0727ahcazj0f0n3xnk)."
 )
 
-# luna calculations
-prism_luna = staked_luna * luna_market_share / 100
-prism_luna_rewards = prism_luna * luna_yield / 100
-staked_yluna_revenue = prism_luna_rewards * yluna_staked / 100 * 0.1
-unstaked_yluna_revenue = prism_luna_rewards * (1 - yluna_staked / 100)
-total_yluna_revenue_usd = (staked_yluna_revenue + unstaked_yluna_revenue) * luna_price
-
-# eth calculations
-prism_eth = staked_eth * eth_market_share / 100
-prism_eth_rewards = prism_eth * eth_yield / 100
-staked_yeth_revenue = prism_eth_rewards * yeth_staked / 100 * 0.1
-unstaked_yeth_revenue = prism_eth_rewards * (1 - yeth_staked / 100)
-total_yeth_revenue_usd = (staked_yeth_revenue + unstaked_yeth_revenue) * eth_price
-
-# lp calculations
-prism_lp = total_lp * lp_market_share * 1_000_000_000 / 100
-prism_lp_rewards = prism_lp * lp_yield / 100
-staked_ylp_revenue = prism_lp_rewards * lp_yield / 100 * 0.15
-unstaked_ylp_revenue = prism_lp_rewards * (1 - ylp_staked / 100)
-total_ylp_revenue_usd = staked_ylp_revenue + unstaked_ylp_revenue
+# vault table: one row per profit center
+vaults = vault_table(
+    [
+        (
+            "yLUNA",
+            {
+                "staked": staked_luna,
+                "price": luna_price,
+                "yield": luna_yield,
+                "market_share": luna_market_share,
+                "staked_share": yluna_staked,
+                "fee_rate": 0.1,
+            },
+        ),
+        (
+            "yETH",
+            {
+                "staked": staked_eth,
+                "price": eth_price,
+                "yield": eth_yield,
+                "market_share": eth_market_share,
+                "staked_share": yeth_staked,
+                "fee_rate": 0.1,
+            },
+        ),
+        (
+            "yLP",
+            {
+                "staked": total_lp * 1_000_000_000,
+                "price": 1.0,
+                "yield": lp_yield,
+                "market_share": lp_market_share,
+                "staked_share": ylp_staked,
+                "fee_rate": 0.15,
+                # the yLP fee has always been charged on lp_yield percent of rewards
+                "fee_share": lp_yield,
+            },
+        ),
+    ]
+)
+
+# vault display: (title, unit, staked label)
+vault_display = {
+    "yLUNA": ("LUNA Vault", "", "Total Staked"),
+    "yETH": ("ETH Vault", "", "Total Staked"),
+    "yLP": ("yLP Vaults", "$", "Total Liquidity"),
+}
+
+protocol = {
+    "prism_price": prism_price,
+    "circulating_supply": circulating_supply,
+    "percent_prism_staked": percent_prism_staked,
+}
+
+# every vault in one array operation, single scenario
+results = {
+    name: values[..., 0]
+    for name, values in valuation(vault_arrays(vaults), **protocol).items()
+}
 
 st.markdown("## Profit Centers")
 
-col1, col2, col3 = st.columns(3)
-
-with col1:
-
-    st.subheader("LUNA Vault")
-    st.markdown(
-        f"""
-        | Description | Amount |
-        | --- | ---: |
-        | Total Staked | {staked_luna:,.0f} |
-        | Prism Market Share | {prism_luna:,.0f} |
-        | Rewards per year | {prism_luna_rewards:,.0f} |
-        | Staked yLUNA Revenue | {staked_yluna_revenue:,.0f} |
-        | Unstaked yLUNA Revenue | {unstaked_yluna_revenue:,.0f} |
-        | Total yLUNA Revenue | ${total_yluna_revenue_usd:,.0f} |
-        """
-    )
+for col, (i, vault) in zip(st.columns(len(vaults)), enumerate(vaults.index)):
 
-with col2:
-    st.subheader("ETH Vault")
-    st.markdown(
-        f"""
-        | Description | Amount |
-        | --- | ---: |
-        | Total Staked | {staked_eth:,.0f} |
-        | Prism Market Share | {prism_eth:,.0f} |
-        | Rewards per year | {prism_eth_rewards:,.0f} |
-        | Staked yETH Revenue | {staked_yeth_revenue:,.0f} |
-        | Unstaked yETH Revenue | {unstaked_yeth_revenue:,.0f} |
-        | Total yETH Revenue | ${total_yeth_revenue_usd:,.0f} |
-        """
+    title, unit, staked_label = vault_display.get(
+        vault, (f"{vault} Vault", "", "Total Staked")
     )
 
-with col3:
-    st.subheader("yLP Vaults")
-    st.markdown(
-        f"""
-        | Description | Amount |
-        | --- | ---: |
-        | Total Liquidity | ${total_lp * 1_000_000_000:,.0f} |
-        | Prism Market Share | ${prism_lp:,.0f} |
-        | Rewards per year | ${prism_lp_rewards:,.0f} |
-        | Staked yLP Revenue | ${staked_ylp_revenue:,.0f} |
-        | Unstaked yLP Revenue | ${unstaked_ylp_revenue:,.0f} |
-        | Total yLP Revenue | ${total_ylp_revenue_usd:,.0f} |
-        """
-    )
+    with col:
+        st.subheader(title)
+        st.markdown(
+            f"""
+            | Description | Amount |
+            | --- | ---: |
+            | {staked_label} | {unit}{vaults.loc[vault, "staked"]:,.0f} |
+            | Prism Market Share | {unit}{results["prism_amount"][i]:,.0f} |
+            | Rewards per year | {unit}{results["rewards"][i]:,.0f} |
+            | Staked {vault} Revenue | {unit}{results["staked_revenue"][i]:,.0f} |
+            | Unstaked {vault} Revenue | {unit}{results["unstaked_revenue"][i]:,.0f} |
+            | Total {vault} Revenue | ${results["revenue_usd"][i]:,.0f} |
+            """
+        )
 
 st.markdown("<br>", unsafe_allow_html=True)
 
 # metrics
-
-# total revenues
-total_ytoken_revenue_usd = (
-    total_yluna_revenue_usd + total_yeth_revenue_usd + total_ylp_revenue_usd
-)
-
-# total value locked
-tvl = prism_lp + (luna_price * prism_luna) + (eth_price * prism_eth)
-
-# earnings per tvl
-earn_tvl = total_ytoken_revenue_usd / tvl
+total_ytoken_revenue_usd = results["total_ytoken_revenue_usd"]
+tvl = results["tvl"]
+earn_tvl = results["earn_tvl"]
+xprism_revenue_per_token = results["xprism_revenue_per_token"]
+xprism_apr = results["xprism_apr"]
 
 col4, col5, col6 = st.columns(3)
 
@@ -396,16 +413,6 @@ col6.metric(
     value=f"{earn_tvl*100:,.2f}%",
 )
 
-# xprism revenue per token
-xprism_revenue_per_token = (
-    total_ytoken_revenue_usd
-    / (circulating_supply * 1_000_000)
-    / (percent_prism_staked / 100)
-)
-
-# xprism apr
-xprism_apr = xprism_revenue_per_token / prism_price * 100
-
 col7, col8, col9 = st.columns(3)
 
 col7.metric(
@@ -420,6 +427,86 @@ col8.metric(
 
 col9.metric(label="xPRISM APR", value=f"{xprism_apr:.2f}%")
 
+# export valuation outputs
+valuation_columns = {
+    "prism_price": [prism_price],
+    "circulating_supply": [circulating_supply * 1_000_000],
+    "percent_prism_staked": [percent_prism_staked],
+    **{
+        f"total_{vault.lower()}_revenue_usd": results["revenue_usd"][i : i + 1]
+        for i, vault in enumerate(vaults.index)
+    },
+    "total_ytoken_revenue_usd": [total_ytoken_revenue_usd],
+    "tvl": [tvl],
+    "earn_tvl": [earn_tvl],
+    "xprism_revenue_per_token": [xprism_revenue_per_token],
+    "xprism_apr": [xprism_apr],
+}
+
+export_format = st.selectbox("Export Format", list(EXPORT_FORMATS))
+serialize, extension, mime = EXPORT_FORMATS[export_format]
+st.download_button(
+    label=f"Download Valuation ({export_format})",
+    data=serialize(valuation_columns),
+    file_name=f"prism_valuation.{extension}",
+    mime=mime,
+)
+
+# goal seek
+st.markdown("## Goal Seek")
+st.markdown(
+    f"""
+    Solve one assumption for a target xPRISM APR or revenue per TVL, keeping all other assumptions fixed.
+
+    The dashed line marks the risk-free rate of {risk_free_rate:.1%}.
+    """
+)
+
+col10, col11 = st.columns(2)
+
+goal_metric = col10.selectbox(
+    "Target Metric",
+    list(GOAL_SEEK_METRICS),
+    format_func=lambda name: GOAL_SEEK_METRICS[name][0],
+)
+
+# only inputs the chosen metric depends on
+goal_variable = col11.selectbox(
+    "Solve For",
+    goal_seek_variables(goal_metric),
+    format_func=lambda name: GOAL_SEEK_VARIABLES[name][0],
+)
+
+variable_label = GOAL_SEEK_VARIABLES[goal_variable][0]
+metric_label, metric_scale = GOAL_SEEK_METRICS[goal_metric]
+
+# every target percentage solved in one batch, plus the risk-free rate
+target_pct = np.append(np.linspace(1.0, 100.0, 199), risk_free_rate * 100)
+solution = goal_seek(
+    vaults, protocol, goal_variable, goal_metric, target_pct / metric_scale
+)
+breakeven = solution[-1]
+
+if np.isnan(breakeven):
+    st.warning(
+        f"No {variable_label} within its range gives a {metric_label} of {risk_free_rate:.1%}."
+    )
+else:
+    st.metric(
+        label=f"{variable_label} for a {risk_free_rate:.1%} {metric_label}",
+        value=f"{breakeven:,.2f}",
+    )
+
+goal_chart = px.line(
+    x=target_pct[:-1],
+    y=solution[:-1],
+    template="plotly_dark",
+    labels={"x": f"Target {metric_label} (%)", "y": variable_label},
+)
+goal_chart.add_vline(x=risk_free_rate * 100, line_dash="dash")
+
+st.plotly_chart(goal_chart, use_container_width=True)
+
 st.info(
     "You can compare protocol revenue and total value locked at https://www.theblockcrypto.com"
 )
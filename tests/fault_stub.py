@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# delay of a "slow" answer and the error page an "html" answer serves with a 200
+SLOW_SECONDS = 1.0
+HTML_PAGE = b"<html><body>502 Bad Gateway</body></html>"
+
+
+class FaultHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def send(self, status, body, content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        fault = self.server.stub.next_fault()
+
+        if fault == "slow":
+            time.sleep(SLOW_SECONDS)
+        elif fault == "html":
+            return self.send(200, HTML_PAGE, "text/html")
+        elif fault == "chunked":
+            # a chunk length that isn't hex, then hang up
+            self.close_connection = True
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            return self.wfile.write(b"zz\r\n{")
+        elif fault == "gzip":
+            self.send_response(200)
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", "9")
+            self.end_headers()
+            return self.wfile.write(b"not gzip!")
+        elif fault == "redirect":
+            self.send_response(302)
+            self.send_header("Location", self.path)
+            self.send_header("Content-Length", "0")
+            return self.end_headers()
+        elif isinstance(fault, int):
+            return self.send(fault, json.dumps({"error": f"status {fault}"}).encode())
+
+        body = {
+            "query_result": {"port": self.server.server_address[1], "path": self.path}
+        }
+        self.send(200, json.dumps(body).encode())
+
+
+class FaultStub:
+    """
+    Local HTTP server answering each request with the next fault in its script
+
+    A script entry is a status code, "slow", "html", "chunked" (a broken chunked body), "gzip"
+    (a body that isn't gzip), "redirect" (to itself) or "ok". The last entry repeats once the
+    script runs out.
+    """
+
+    def __init__(self, *script):
+        self.script = list(script) or ["ok"]
+        self.hits = 0
+        self.lock = threading.Lock()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FaultHandler)
+        self.server.stub = self
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    def next_fault(self):
+        with self.lock:
+            fault = self.script[min(self.hits, len(self.script) - 1)]
+            self.hits += 1
+            return fault
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
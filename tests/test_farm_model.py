@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from farm_model import compute_scenarios, scenario_gradients
+
+STATE = {
+    "yluna_price": 80.0,
+    "xprism_price": 0.9,
+    "prism_price": 1.1,
+    "yluna_staked": 20_000_000.0,
+    "xprism_pledged": 40_000_000.0,
+    "total_amps": 300_000_000.0,
+    "user_yluna": 1_000.0,
+    "user_xprism": 5_000.0,
+    "user_amps": 12_000.0,
+}
+
+
+def population_state(n_stakers=500, seed=0):
+    random = np.random.default_rng(seed)
+
+    return {
+        **STATE,
+        "others_yluna": random.lognormal(8, 2, n_stakers),
+        "others_xprism": random.lognormal(8, 2, n_stakers)
+        * random.integers(0, 2, n_stakers),
+        "others_amps": random.lognormal(10, 2, n_stakers),
+    }
+
+
+def finite_differences(point, state, h=1e-3):
+    """
+    Central differences of daily rewards and total APR from compute_scenarios
+    """
+
+    gradients = {"daily_rewards": {}, "total_apr": {}}
+
+    for name in point:
+        up = compute_scenarios(**{**point, name: point[name] + h}, state=state)
+        down = compute_scenarios(**{**point, name: point[name] - h}, state=state)
+
+        for metric, column in [
+            ("daily_rewards", "new_daily_rewards"),
+            ("total_apr", "new_total_apr"),
+        ]:
+            gradients[metric][name] = (up[column] - down[column]) / (2 * h)
+
+    return gradients
+
+
+@pytest.mark.parametrize(
+    "state", [STATE, population_state()], ids=["aggregate", "population"]
+)
+@pytest.mark.parametrize("day", [1, 3, 2.5])
+def test_gradients_match_finite_differences(state, day):
+    # above the current pledge, so neither side of the difference resets AMPS
+    point = {"new_user_yluna": 1_200.0, "new_user_xprism": 6_000.0, "day": day}
+
+    analytic = scenario_gradients(*point.values(), state)
+    numeric = finite_differences(point, state)
+
+    for metric in analytic:
+        for name, argument in zip(["yluna", "xprism", "day"], point):
+            assert float(analytic[metric][name]) == pytest.approx(
+                float(numeric[metric][argument]), rel=1e-4
+            )
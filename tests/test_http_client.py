@@ -0,0 +1,154 @@
+import pickle
+import time
+
+import pytest
+
+from fault_stub import FaultStub
+from http_client import HttpClient, ResponseError, UpstreamUnavailable
+
+
+def fast_client(*mirrors, **settings):
+    return HttpClient(
+        lcd_mirrors=[mirror.url for mirror in mirrors],
+        **{"backoff": 0.01, "hedge_delay": 0.2, **settings},
+    )
+
+
+def answered_by(result, stub):
+    return result["query_result"]["port"] == stub.server.server_address[1]
+
+
+def test_retries_transient_statuses():
+    with FaultStub(503, 503, "ok") as stub:
+        result = fast_client(stub).get_json(stub.url + "/x")
+
+    assert answered_by(result, stub)
+    assert stub.hits == 3
+
+
+def test_exhausted_retries_raise_upstream_unavailable():
+    with FaultStub(503) as stub:
+        with pytest.raises(UpstreamUnavailable):
+            fast_client(stub, retries=2).get_json(stub.url + "/x")
+
+    assert stub.hits == 3
+
+
+@pytest.mark.parametrize("fault", ["chunked", "gzip"])
+def test_retries_broken_bodies(fault):
+    with FaultStub(fault, "ok") as stub:
+        result = fast_client(stub).get_json(stub.url + "/x")
+
+    assert answered_by(result, stub)
+    assert stub.hits == 2
+
+
+@pytest.mark.parametrize("fault", ["chunked", "gzip", "redirect"])
+def test_transport_errors_raise_upstream_unavailable(fault):
+    with FaultStub(fault) as stub:
+        client = fast_client(stub, retries=1)
+
+        with pytest.raises(UpstreamUnavailable):
+            client.get_json(stub.url + "/x")
+
+    assert client.breaker(stub.url[len("http://") :]).failures == 2
+
+
+def test_non_json_body_is_response_error():
+    with FaultStub("html") as stub:
+        with pytest.raises(ResponseError) as error:
+            fast_client(stub).get_json(stub.url + "/x")
+
+    assert error.value.status_code == 200
+    assert stub.hits == 1
+
+
+def test_breaker_opens_after_threshold():
+    with FaultStub(503) as stub:
+        client = fast_client(stub, retries=5, failure_threshold=2, cooldown=60)
+
+        with pytest.raises(UpstreamUnavailable, match="circuit open"):
+            client.get_json(stub.url + "/x")
+        with pytest.raises(UpstreamUnavailable, match="circuit open"):
+            client.get_json(stub.url + "/x")
+
+    # the open circuit stops calls before they reach the host
+    assert stub.hits == 2
+
+
+def test_breaker_half_open_trial_closes_on_success():
+    with FaultStub(503, 503, "ok") as stub:
+        client = fast_client(stub, retries=1, failure_threshold=2, cooldown=0.2)
+
+        with pytest.raises(UpstreamUnavailable):
+            client.get_json(stub.url + "/x")
+
+        time.sleep(0.25)
+        result = client.get_json(stub.url + "/x")
+
+    assert answered_by(result, stub)
+    assert client.breaker(stub.url[len("http://") :]).opened_at is None
+
+
+def test_breaker_half_open_trial_reopens_on_failure():
+    with FaultStub(503) as stub:
+        client = fast_client(stub, retries=1, failure_threshold=2, cooldown=0.2)
+
+        with pytest.raises(UpstreamUnavailable):
+            client.get_json(stub.url + "/x")
+
+        time.sleep(0.25)
+        with pytest.raises(UpstreamUnavailable, match="circuit open"):
+            client.get_json(stub.url + "/x")
+
+    # one trial after the cooldown, then open again
+    assert stub.hits == 3
+
+
+def test_hedges_to_second_mirror_when_first_is_slow():
+    with FaultStub("slow") as slow, FaultStub("ok") as fast:
+        started = time.monotonic()
+        result = fast_client(slow, fast).lcd_get("/x")
+        elapsed = time.monotonic() - started
+
+    assert answered_by(result, fast)
+    assert elapsed < 0.8
+
+
+def test_fails_over_when_first_mirror_is_down():
+    with FaultStub(503) as down, FaultStub("ok") as up:
+        result = fast_client(down, up, retries=1).lcd_get("/x")
+
+    assert answered_by(result, up)
+
+
+@pytest.mark.parametrize("fault", [500, 404, "html", "chunked", "gzip", "redirect"])
+def test_fails_over_on_mirror_errors(fault):
+    with FaultStub(fault) as broken, FaultStub("ok") as up:
+        result = fast_client(broken, up).lcd_get("/x")
+
+    assert answered_by(result, up)
+
+
+def test_query_error_is_not_hedged():
+    with FaultStub(400) as first, FaultStub("ok") as second:
+        with pytest.raises(ResponseError) as error:
+            fast_client(first, second).lcd_get("/x")
+
+    assert error.value.status_code == 400
+    assert second.hits == 0
+
+
+def test_all_mirrors_failing_raises_upstream_unavailable():
+    with FaultStub(500) as first, FaultStub("html") as second:
+        with pytest.raises(UpstreamUnavailable):
+            fast_client(first, second).lcd_get("/x")
+
+
+def test_client_pickles_by_settings():
+    with FaultStub("ok") as stub:
+        client = fast_client(stub)
+        restored = pickle.loads(pickle.dumps(client))
+
+        assert restored.settings == client.settings
+        assert answered_by(restored.lcd_get("/x"), stub)
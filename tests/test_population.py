@@ -0,0 +1,68 @@
+import time
+
+import population
+from population import SchemaMismatch, StakerCache
+
+# one staker per contract, answered under the list keys the listings expect
+PAGES = {
+    "reward_infos": {
+        "reward_infos": [{"staker_addr": "terra1a", "bond_amount": "2000000"}]
+    },
+    "get_boosts": {
+        "boosts": [
+            {"user": "terra1a", "amt_bonded": "1000000", "total_boost": "3000000"}
+        ]
+    },
+}
+
+
+def settle(cache):
+    if cache.thread is not None:
+        cache.thread.join(timeout=5)
+
+
+def test_failed_crawl_keeps_error_and_backs_off(monkeypatch):
+    calls = []
+
+    def wrong_schema(contract, message):
+        calls.append(message)
+        return {"unexpected": []}
+
+    monkeypatch.setattr(population, "query_contract", wrong_schema)
+    cache = StakerCache(retry_after=60)
+
+    for _ in range(5):
+        cache.refresh()
+        settle(cache)
+
+        assert isinstance(cache.error, SchemaMismatch)
+        assert not cache.ready
+
+    # one crawl of both contracts, the reruns wait out the backoff
+    assert len(calls) == 2
+
+
+def test_successful_crawl_clears_error(monkeypatch):
+    monkeypatch.setattr(
+        population, "query_contract", lambda contract, message: {"unexpected": []}
+    )
+    cache = StakerCache(retry_after=0.1)
+    cache.refresh()
+    settle(cache)
+
+    monkeypatch.setattr(
+        population,
+        "query_contract",
+        lambda contract, message: PAGES[next(iter(message))],
+    )
+    time.sleep(0.15)
+    cache.refresh()
+    settle(cache)
+
+    assert cache.error is None
+    assert cache.ready
+
+    yluna, xprism, amps = cache.arrays()
+    assert list(yluna) == [2.0]
+    assert list(xprism) == [1.0]
+    assert list(amps) == [3.0]
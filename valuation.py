@@ -0,0 +1,224 @@
+import numpy as np
+import pandas as pd
+
+# vault table columns, percentages as entered in the sidebar
+VAULT_COLUMNS = [
+    "staked",
+    "price",
+    "yield",
+    "market_share",
+    "staked_share",
+    "fee_rate",
+    "fee_share",
+]
+
+# goal seek variables: (label, vault or None for protocol inputs, column, lower, upper, scale,
+# metrics that depend on the variable)
+GOAL_SEEK_VARIABLES = {
+    "prism_price": (
+        "PRISM Price",
+        None,
+        "prism_price",
+        0.01,
+        100.0,
+        1,
+        ("xprism_apr",),
+    ),
+    "circulating_supply": (
+        "Circulating Supply (Millions)",
+        None,
+        "circulating_supply",
+        70.0,
+        1_000.0,
+        1,
+        ("xprism_apr",),
+    ),
+    "percent_prism_staked": (
+        "PRISM Staked (%)",
+        None,
+        "percent_prism_staked",
+        0.1,
+        100.0,
+        1,
+        ("xprism_apr",),
+    ),
+    "luna_price": (
+        "LUNA Price",
+        "yLUNA",
+        "price",
+        1.0,
+        1_000.0,
+        1,
+        ("xprism_apr", "earn_tvl"),
+    ),
+    "luna_market_share": (
+        "LUNA Staked Market Share (%)",
+        "yLUNA",
+        "market_share",
+        1.0,
+        100.0,
+        1,
+        ("xprism_apr", "earn_tvl"),
+    ),
+    "eth_market_share": (
+        "Staked ETH Market Share (%)",
+        "yETH",
+        "market_share",
+        1.0,
+        100.0,
+        1,
+        ("xprism_apr", "earn_tvl"),
+    ),
+    "total_lp": (
+        "Total Liquidity on Terra (Billions)",
+        "yLP",
+        "staked",
+        0.5,
+        100.0,
+        1_000_000_000,
+        ("xprism_apr", "earn_tvl"),
+    ),
+    "lp_market_share": (
+        "LP Market Share (%)",
+        "yLP",
+        "market_share",
+        0.01,
+        10.0,
+        1,
+        ("xprism_apr", "earn_tvl"),
+    ),
+}
+
+# goal seek metrics: (label, scale to percent)
+GOAL_SEEK_METRICS = {
+    "xprism_apr": ("xPRISM APR", 1),
+    "earn_tvl": ("Revenue Per Total Value Locked", 100),
+}
+
+
+def goal_seek_variables(metric):
+    """
+    Goal seek variables the metric depends on
+    """
+
+    return [
+        name for name, variable in GOAL_SEEK_VARIABLES.items() if metric in variable[6]
+    ]
+
+
+def vault_arrays(vaults, n_scenarios=1):
+    """
+    Expand a vault table into vaults x scenarios arrays, one per column
+    """
+
+    return {
+        column: np.repeat(
+            vaults[column].to_numpy(dtype=float)[:, None], n_scenarios, axis=1
+        )
+        for column in VAULT_COLUMNS
+    }
+
+
+def valuation(vaults, prism_price, circulating_supply, percent_prism_staked):
+    """
+    Revenue, TVL and xPRISM APR for every vault x scenario in one array operation
+
+    vaults maps each of VAULT_COLUMNS to an array of shape (n_vaults, n_scenarios),
+    protocol inputs broadcast against the scenario axis.
+    """
+
+    v = {column: np.asarray(vaults[column], dtype=float) for column in VAULT_COLUMNS}
+
+    prism_amount = v["staked"] * v["market_share"] / 100
+    rewards = prism_amount * v["yield"] / 100
+    staked_revenue = rewards * v["fee_share"] / 100 * v["fee_rate"]
+    unstaked_revenue = rewards * (1 - v["staked_share"] / 100)
+    revenue_usd = (staked_revenue + unstaked_revenue) * v["price"]
+    vault_tvl = prism_amount * v["price"]
+
+    total_ytoken_revenue_usd = revenue_usd.sum(axis=0)
+    tvl = vault_tvl.sum(axis=0)
+
+    xprism_revenue_per_token = (
+        total_ytoken_revenue_usd
+        / (np.asarray(circulating_supply, dtype=float) * 1_000_000)
+        / (np.asarray(percent_prism_staked, dtype=float) / 100)
+    )
+
+    return {
+        # per vault
+        "prism_amount": prism_amount,
+        "rewards": rewards,
+        "staked_revenue": staked_revenue,
+        "unstaked_revenue": unstaked_revenue,
+        "revenue_usd": revenue_usd,
+        "vault_tvl": vault_tvl,
+        # per scenario
+        "total_ytoken_revenue_usd": total_ytoken_revenue_usd,
+        "tvl": tvl,
+        "earn_tvl": total_ytoken_revenue_usd / tvl,
+        "xprism_revenue_per_token": xprism_revenue_per_token,
+        "xprism_apr": xprism_revenue_per_token / np.asarray(prism_price) * 100,
+    }
+
+
+def goal_seek(vaults, protocol, variable, metric, targets, iterations=60):
+    """
+    Solve one assumption for many metric targets at once by batched bisection
+
+    Targets the metric can't reach within the variable's bounds are returned as nan.
+    """
+
+    targets = np.asarray(targets, dtype=float)
+    label, vault, column, lower, upper, scale, metrics = GOAL_SEEK_VARIABLES[variable]
+
+    if metric not in metrics:
+        raise ValueError(f"{metric} does not depend on {label}")
+
+    def evaluate(value):
+        value = np.broadcast_to(np.asarray(value, dtype=float) * scale, targets.shape)
+        arrays = vault_arrays(vaults, targets.size)
+        inputs = dict(protocol)
+
+        if vault is None:
+            inputs[column] = value
+        else:
+            arrays[column][vaults.index.get_loc(vault)] = value
+
+        return valuation(arrays, **inputs)[metric]
+
+    at_lower, at_upper = evaluate(lower), evaluate(upper)
+    increasing = at_upper >= at_lower
+
+    lo = np.full_like(targets, lower)
+    hi = np.full_like(targets, upper)
+
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        # the solution lies below mid when the metric has already passed the target
+        below = (evaluate(mid) >= targets) == increasing
+        hi = np.where(below, mid, hi)
+        lo = np.where(below, lo, mid)
+
+    reachable = (targets >= np.minimum(at_lower, at_upper)) & (
+        targets <= np.maximum(at_lower, at_upper)
+    )
+
+    return np.where(reachable, (lo + hi) / 2, np.nan)
+
+
+def vault_table(rows):
+    """
+    Build a vault table indexed by vault name from (name, {column: value}) rows
+
+    fee_share is the percentage of rewards the fee is charged on and defaults to staked_share.
+    """
+
+    vaults = pd.DataFrame(
+        [values for _, values in rows],
+        index=[name for name, _ in rows],
+        columns=VAULT_COLUMNS,
+    )
+    vaults["fee_share"] = vaults["fee_share"].fillna(vaults["staked_share"])
+
+    return vaults